@@ -4,8 +4,6 @@ inputs of agent: User message (str), conversation history (List[Dict[str, str]])
 output json of the agent: Dictionary containing response, tool calls, timestamp, and agent name.
 method: Filters input, detects SOS, uses fast paths for common requests, or routes via supervisor.
 """
-import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
 from typing import List, Dict, Any, Tuple
 import re
 from .base_agent import BaseAgent
@@ -17,8 +15,8 @@ from .service_booking_agent import ServiceBookingAgent
 from .checkin_agent import CheckInAgent
 from .conversation_memory import ConversationMemory
 from .sos_agent import SOSAgent  # New import for SOS handling
+from ..local_model_chatbot import DEFAULT_MODEL_PATH, load_model_and_tokenizer
 from datetime import datetime, timezone
-import os
 
 class AgentManager:
     def __init__(self):
@@ -42,18 +40,8 @@ class AgentManager:
         self.memory = ConversationMemory()
 
     def load_model(self):
-        model_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'finetunedmodel-merged'))
-        tokenizer = AutoTokenizer.from_pretrained(model_path, trust_remote_code=True)
-        print(f"Loading model from: {model_path}")
-
-        tokenizer = AutoTokenizer.from_pretrained(model_path, trust_remote_code=True)
-        model = AutoModelForCausalLM.from_pretrained(
-            model_path,
-            trust_remote_code=True,
-            load_in_8bit=True,  # Enable bitsandbytes quantization if needed
-            device_map="auto"  # Automatically selects CUDA if available
-        )
-
+        # Shared with LocalModelChatbot and LocalLLM, so the weights are only loaded once per process
+        model, tokenizer = load_model_and_tokenizer(DEFAULT_MODEL_PATH)
         print("✅ Model loaded successfully!")
         return model, tokenizer
 
@@ -128,29 +116,25 @@ class AgentManager:
         
         if was_filtered:
             safe_response = self._get_safe_output_response()
-            self.memory.add_message("user", filtered_message)
+            self.memory.add_message("user", filtered_message, save=False)
             self.memory.add_message("assistant", safe_response["response"], "FilterAgent")
             return safe_response
         
-        self.memory.add_message("user", message)
+        # The conversation file is written once, together with the reply
+        self.memory.add_message("user", message, save=False)
         
         # SOS Emergency Detection - Highest Priority
-        sos_keywords = [
-            "fire", "emergency", "help", "panic attack",
-            "medical help", "urgent", "danger", "hurt",
-            "bleeding", "choking", "unconscious",
-            "need assistance", "sos", "critical"
-        ]
-        if any(keyword in message.lower() for keyword in sos_keywords):
+        if self.sos_agent.should_handle(message):
             response = self.sos_agent.process(message, self.memory)
             self.memory.add_message("assistant", response["response"], "SOSAgent")
             return response
         
         # All routing decisions except SOS are now handled via LLM in SupervisorAgent
         response = self.supervisor.process(message, self.memory)
-        self.memory.add_message("assistant", response["response"], response.get("agent", "SupervisorAgent"))
-        if "tool_calls" not in response:
-            response["tool_calls"] = []
+        # Fill in the fields every caller expects so none of them need fallbacks
+        agent_name = response.setdefault("agent", "SupervisorAgent")
+        response.setdefault("tool_calls", [])
+        self.memory.add_message("assistant", response["response"], agent_name)
         return response
 
     def handle_error(self, error: Exception) -> Dict[str, Any]:
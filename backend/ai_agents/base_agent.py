@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Tuple, Optional, Callable
 from datetime import datetime, timezone
+from functools import lru_cache
 import torch
 import re
 import os
@@ -10,6 +11,26 @@ from langchain_core.tools import BaseTool
 from langchain.tools import Tool
 from langchain_core.pydantic_v1 import BaseModel as LangChainBaseModel
 
+from ..local_model_chatbot import GREEDY_GENERATION_KWARGS, HISTORY_MARKERS, TURN_MARKERS, generate_reply
+
+# Probed once at import and shared by every agent
+_DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+def compile_keyword_pattern(keywords) -> "re.Pattern":
+    """
+    Compile a keyword list into a single case-insensitive alternation.
+    
+    One regex search scans the message once in C instead of running a
+    Python-level substring check per keyword.
+    
+    Args:
+        keywords: Iterable of literal keywords or phrases
+    
+    Returns:
+        re.Pattern: Compiled pattern matching any of the keywords
+    """
+    return re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE)
+
 class ToolDefinition:
     def __init__(self, name: str, description: str):
         self.name = name
@@ -58,7 +79,7 @@ class BaseAgent(ABC):
         self.name = name
         self.model = model
         self.tokenizer = tokenizer
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.device = _DEVICE
         self.priority = 0  # Default priority
         self.description = "Base agent for hotel management system"
         self.system_prompt = self.load_prompt("base_agent_prompt.txt")
@@ -76,9 +97,7 @@ class BaseAgent(ABC):
             str: The loaded prompt with optional context substitution
         """
         try:
-            prompt_path = os.path.join(os.path.dirname(__file__), 'prompts', filepath)
-            with open(prompt_path, 'r', encoding='utf-8') as f:
-                prompt_template = f.read().strip()
+            prompt_template = BaseAgent._read_prompt_template(filepath)
             
             # Replace {context} if provided
             return prompt_template.format(context=context)
@@ -89,6 +108,25 @@ class BaseAgent(ABC):
             print(f"Error loading prompt {filepath}: {e}")
             return "You are an AI assistant helping with hotel-related tasks."
 
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _read_prompt_template(filepath: str) -> str:
+        """
+        Read a prompt template from the prompts directory.
+        
+        Prompt files are static, so the contents are cached per file name and
+        shared across every agent instance.
+        
+        Args:
+            filepath (str): Name of the prompt file in the prompts directory
+        
+        Returns:
+            str: The raw prompt template
+        """
+        prompt_path = os.path.join(os.path.dirname(__file__), 'prompts', filepath)
+        with open(prompt_path, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+
     @abstractmethod
     def should_handle(self, message: str) -> bool:
         pass
@@ -236,29 +274,12 @@ class BaseAgent(ABC):
         # Create a prompt with history and system instructions
         full_prompt = f"<|system|>\n{system_prompt}\n\nConversation history:\n{conversation_context}\n<|user|>\n{filtered_input}\n<|assistant|>\n"
     
-        inputs = self.tokenizer(full_prompt, return_tensors="pt", truncation=True, max_length=1024)
-        inputs = {key: value.to(self.device) for key, value in inputs.items()}
-    
-        with torch.no_grad():
-            outputs = self.model.generate(
-                **inputs,
-                max_new_tokens=150,
-                temperature=0.7,
-                top_k=50,
-                top_p=0.9,
-                repetition_penalty=1.2,
-                pad_token_id=self.tokenizer.eos_token_id
-            )
-        
-        full_response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-        
-        # Extract only the assistant's response part
-        if "<|assistant|>" in full_response:
-            assistant_response = full_response.split("<|assistant|>")[-1].strip()
-            return assistant_response
-        else:
-            # Fallback if the expected format is not found
-            fallback_response = full_response
-            # Still filter the fallback response
-            filtered_fallback, _ = self.filter_output(fallback_response)
-            return filtered_fallback
\ No newline at end of file
+        # The prompt embeds the history, so also stop if the model starts an imagined history line
+        return generate_reply(
+            self.model,
+            self.tokenizer,
+            full_prompt,
+            device=self.device,
+            stop_strings=TURN_MARKERS + HISTORY_MARKERS,
+            **GREEDY_GENERATION_KWARGS
+        )
\ No newline at end of file
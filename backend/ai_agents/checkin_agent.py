@@ -39,7 +39,8 @@ class CheckInAgent(BaseAgent):
             r'\b(extra\s*night)\b'
         ]
         
-        return any(re.search(pattern, message.lower()) for pattern in check_in_patterns)
+        message_lower = message.lower()
+        return any(re.search(pattern, message_lower) for pattern in check_in_patterns)
 
     @tool
     def query_booking(self, booking_id: str) -> Dict[str, Any]:
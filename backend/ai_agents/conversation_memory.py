@@ -5,6 +5,58 @@ import os
 import re
 import uuid
 
+# Personal data patterns, applied in this order
+_PII_PATTERNS = [
+    # Phone numbers (various formats)
+    ("PHONE_NUMBER", r'\b(?:\+\d{1,3}[-\s]?)?\(?\d{3}\)?[-\s]?\d{3}[-\s]?\d{4}\b'),
+    
+    # Email addresses
+    ("EMAIL_ADDRESS", r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
+    
+    # Credit card numbers (simplified pattern)
+    ("PAYMENT_CARD", r'\b(?:\d{4}[-\s]?){3}\d{4}\b'),
+    
+    # Names (common title + name pattern, simplified)
+    ("NAME", r'\b(?:Mr\.|Mrs\.|Ms\.|Dr\.|Prof\.)\s+[A-Z][a-z]+\b'),
+    
+    # Room numbers
+    ("ROOM_NUMBER", r'\b(?:room|suite)\s+\d+\b'),
+    
+    # Addresses (simplified pattern)
+    ("ADDRESS", r'\b\d+\s+[A-Za-z]+\s+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr)\b'),
+    
+    # Social Security Numbers (US)
+    ("SSN", r'\b\d{3}-\d{2}-\d{4}\b'),
+    
+    # Passport numbers (simplified pattern)
+    ("PASSPORT_NUMBER", r'\b[A-Z]{1,2}\d{6,9}\b'),
+]
+
+# Each pattern compiled once, with its placeholder
+_PII_REGEXES = [(re.compile(pattern, re.IGNORECASE), f"[{label}]") for label, pattern in _PII_PATTERNS]
+
+# Union of all patterns. Most messages contain no personal data, so one scan with this
+# settles them. Its matches are not used for replacing: at overlaps the leftmost match
+# would win instead of the pattern order (e.g. "Dr. jones@clinic.org" would become
+# "[NAME]@clinic.org").
+_PII_RE = re.compile("|".join(f"(?:{pattern})" for _, pattern in _PII_PATTERNS), re.IGNORECASE)
+
+def anonymize_personal_data(text: str) -> str:
+    """
+    Anonymize personal identifiable information in text.
+    
+    Args:
+        text: The text to anonymize
+        
+    Returns:
+        Anonymized text with personal data replaced by placeholders such as [EMAIL_ADDRESS]
+    """
+    if _PII_RE.search(text) is None:
+        return text
+    for regex, placeholder in _PII_REGEXES:
+        text = regex.sub(placeholder, text)
+    return text
+
 class ConversationMemory:
     def __init__(self, max_history_length=10, summary_threshold=15):
         self.conversation_history = []
@@ -12,29 +64,43 @@ class ConversationMemory:
         self.summary_threshold = summary_threshold
         self.conversation_id = f"conv_{datetime.now().strftime('%Y%m%d%H%M%S')}"
         self.summaries = []
+        # Rendered history, reused by every prompt built until the next message arrives
+        self._formatted_history = None
         # GDPR related attributes
         self.consent_status = "pending"  # Options: pending, granted, denied
         self.data_purposes = ["customer_service"]  # Default purpose
         self.retention_period = 90  # Default retention in days
         self.data_subject_id = str(uuid.uuid4())  # Anonymous identifier
         
-    def add_message(self, role: str, content: str, agent: str = None):
-        """Add a new message to the conversation history with GDPR compliance"""
+    def add_message(self, role: str, content: str, agent: str = None, save: bool = True):
+        """
+        Add a new message to the conversation history with GDPR compliance
+        
+        Args:
+            role: "user" or "assistant"
+            content: The message text
+            agent: Name of the agent that produced the message
+            save: Write the conversation to disk now. Pass False when another
+                message is about to be added so the file is written once per turn.
+        """
         # Anonymize personal data if it's a user message
         if role == "user":
             anonymized_content = self._anonymize_personal_data(content)
         else:
             anonymized_content = content
             
+        # One clock read for the timestamp, the retention date and the saved record
+        now = datetime.now(timezone.utc)
+        
         # Calculate retention date
-        retention_date = (datetime.now(timezone.utc) + timedelta(days=self.retention_period)).isoformat()
+        retention_date = (now + timedelta(days=self.retention_period)).isoformat()
         
         message = {
             "id": str(uuid.uuid4()),  # Unique identifier for each message
             "role": role,  # "user" or "assistant"
             "content": anonymized_content,
             "original_length": len(content),  # Store original length for analytics without content
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": now.isoformat(),
             "agent": agent,
             "gdpr_metadata": {
                 "retention_date": retention_date,
@@ -45,31 +111,36 @@ class ConversationMemory:
             }
         }
         self.conversation_history.append(message)
+        self._formatted_history = None
         
         # If history exceeds threshold, summarize older messages
         if len(self.conversation_history) > self.summary_threshold:
             self._summarize_oldest_messages()
             
         # Save conversation to disk
-        self._save_conversation()
+        if save:
+            self._save_conversation(now)
         
     def get_formatted_history(self, max_tokens=1024) -> str:
         """Get formatted conversation history for context window"""
-        formatted_history = ""
+        if self._formatted_history is not None:
+            return self._formatted_history
+        
+        parts = []
         
         # Add summaries first
         if self.summaries:
-            formatted_history += "Previous conversation summary:\n"
-            for summary in self.summaries:
-                formatted_history += f"- {summary}\n"
-            formatted_history += "\n"
+            parts.append("Previous conversation summary:\n")
+            parts.extend(f"- {summary}\n" for summary in self.summaries)
+            parts.append("\n")
         
         # Add recent messages
         for message in self.conversation_history[-self.max_history_length:]:
             role = "User" if message["role"] == "user" else "Assistant"
-            formatted_history += f"{role}: {message['content']}\n"
+            parts.append(f"{role}: {message['content']}\n")
             
-        return formatted_history
+        self._formatted_history = "".join(parts)
+        return self._formatted_history
     
     def _summarize_oldest_messages(self):
         """Summarize oldest messages to save context window space"""
@@ -106,42 +177,13 @@ class ConversationMemory:
         Returns:
             Anonymized text with personal data replaced
         """
-        # Patterns for common personal data
-        patterns = [
-            # Phone numbers (various formats)
-            (r'\b(?:\+\d{1,3}[-\s]?)?\(?\d{3}\)?[-\s]?\d{3}[-\s]?\d{4}\b', '[PHONE_NUMBER]'),
-            
-            # Email addresses
-            (r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL_ADDRESS]'),
-            
-            # Credit card numbers (simplified pattern)
-            (r'\b(?:\d{4}[-\s]?){3}\d{4}\b', '[PAYMENT_CARD]'),
-            
-            # Names (common title + name pattern, simplified)
-            (r'\b(?:Mr\.|Mrs\.|Ms\.|Dr\.|Prof\.)\s+[A-Z][a-z]+\b', '[NAME]'),
-            
-            # Room numbers
-            (r'\b(?:room|suite)\s+\d+\b', '[ROOM_NUMBER]'),
-            
-            # Addresses (simplified pattern)
-            (r'\b\d+\s+[A-Za-z]+\s+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr)\b', '[ADDRESS]'),
-            
-            # Social Security Numbers (US)
-            (r'\b\d{3}-\d{2}-\d{4}\b', '[SSN]'),
-            
-            # Passport numbers (simplified pattern)
-            (r'\b[A-Z]{1,2}\d{6,9}\b', '[PASSPORT_NUMBER]')
-        ]
-        
-        # Apply each pattern
-        anonymized_text = text
-        for pattern, replacement in patterns:
-            anonymized_text = re.sub(pattern, replacement, anonymized_text, flags=re.IGNORECASE)
-            
-        return anonymized_text
+        return anonymize_personal_data(text)
     
-    def _save_conversation(self):
+    def _save_conversation(self, now: datetime = None):
         """Save conversation to disk with GDPR compliance"""
+        if now is None:
+            now = datetime.now(timezone.utc)
+        
         # Create directory structure that separates data by date for easier retention management
         year_month = datetime.now().strftime('%Y-%m')
         log_dir = os.path.join("data", "conversations", year_month)
@@ -156,8 +198,8 @@ class ConversationMemory:
             "summaries": self.summaries,
             "messages": self.conversation_history,
             "gdpr_metadata": {
-                "creation_date": datetime.now(timezone.utc).isoformat(),
-                "retention_date": (datetime.now(timezone.utc) + timedelta(days=self.retention_period)).isoformat(),
+                "creation_date": now.isoformat(),
+                "retention_date": (now + timedelta(days=self.retention_period)).isoformat(),
                 "purposes": self.data_purposes,
                 "consent_status": self.consent_status,
                 "data_controller": "Hotel AI System",
@@ -202,6 +244,7 @@ class ConversationMemory:
                 self.conversation_id = data["id"]
                 self.summaries = data["summaries"]
                 self.conversation_history = data["messages"]
+                self._formatted_history = None
                 
                 # Load GDPR metadata if available
                 if "gdpr_metadata" in data:
@@ -251,6 +294,7 @@ class ConversationMemory:
         # Clear memory
         self.conversation_history = []
         self.summaries = []
+        self._formatted_history = None
         
         # Generate a new conversation ID and data subject ID
         self.conversation_id = f"conv_{datetime.now().strftime('%Y%m%d%H%M%S')}"
@@ -2,9 +2,8 @@ from typing import Optional, List, Any
 from pydantic import BaseModel, Field, ConfigDict
 from langchain_core.language_models import LLM
 from langchain_core.callbacks import CallbackManagerForLLMRun
-from transformers import AutoModelForCausalLM, AutoTokenizer
-import torch
-import os
+
+from ..local_model_chatbot import DEFAULT_MODEL_PATH, GREEDY_GENERATION_KWARGS, TURN_MARKERS, generate_reply, load_model_and_tokenizer
 
 class LocalLLM(LLM, BaseModel):
     """
@@ -17,7 +16,7 @@ class LocalLLM(LLM, BaseModel):
     """
     
     model_path: str = Field(
-        default=os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'finetunedmodel-merged')),
+        default=DEFAULT_MODEL_PATH,
         description="Path to the local model directory"
     )
     
@@ -49,17 +48,8 @@ class LocalLLM(LLM, BaseModel):
         """
         # If model or tokenizer not provided, load from path
         if model is None or tokenizer is None:
-            print(f"Loading model from: {self.model_path}")
-            tokenizer = AutoTokenizer.from_pretrained(
-                self.model_path, 
-                trust_remote_code=True
-            )
-            model = AutoModelForCausalLM.from_pretrained(
-                self.model_path,
-                trust_remote_code=True,
-                load_in_8bit=True,
-                device_map="auto"
-            )
+            # Fields aren't populated until Pydantic's __init__ runs, so read the path from data
+            model, tokenizer = load_model_and_tokenizer(data.get('model_path', DEFAULT_MODEL_PATH))
         
         # Update model and tokenizer
         data['model'] = model
@@ -118,26 +108,11 @@ class LocalLLM(LLM, BaseModel):
         
         full_prompt = f"<|system|>\n{system_prompt}\n<|user|>\n{prompt}\n<|assistant|>\n"
         
-        # Tokenize and generate
-        inputs = self.tokenizer(full_prompt, return_tensors="pt", truncation=True, max_length=1024)
-        inputs = {key: value.to(self.model.device) for key, value in inputs.items()}
-        
-        with torch.no_grad():
-            outputs = self.model.generate(
-                **inputs,
-                max_new_tokens=150,
-                temperature=0.7,
-                top_k=50,
-                top_p=0.9,
-                repetition_penalty=1.2,
-                pad_token_id=self.tokenizer.eos_token_id
-            )
-        
-        # Decode and extract assistant's response
-        full_response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-        
-        if "<|assistant|>" in full_response:
-            assistant_response = full_response.split("<|assistant|>")[-1].strip()
-            return assistant_response
-        else:
-            return full_response
\ No newline at end of file
+        # Caller-supplied stop sequences end the reply just like a new turn does
+        return generate_reply(
+            self.model,
+            self.tokenizer,
+            full_prompt,
+            stop_strings=TURN_MARKERS + tuple(stop or ()),
+            **GREEDY_GENERATION_KWARGS
+        )
\ No newline at end of file
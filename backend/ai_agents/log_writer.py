@@ -0,0 +1,181 @@
+"""
+Background writer for the agents' JSONL log files.
+
+Agents submit log records from the request path; a single daemon thread
+serializes them and appends them to disk in batches, so disk latency never
+shows up in response latency.
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from typing import Any, BinaryIO, Dict, List, Tuple
+
+import orjson
+
+
+class BackgroundLogWriter:
+    """
+    Queue-backed JSONL writer drained by a single daemon thread.
+
+    Records are grouped into batches of up to ``max_batch_bytes`` of encoded
+    JSON or ``flush_interval`` seconds, whichever comes first, and each batch
+    is written with one ``write`` call per log file. File handles stay open
+    between batches and are closed once a file has been idle for
+    ``idle_close_after`` seconds, which also retires the previous day's file
+    after the date rolls over. When the queue is full new records are dropped
+    rather than blocking the caller.
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int = 10000,
+        max_batch_bytes: int = 64 * 1024,
+        flush_interval: float = 0.05,
+        idle_close_after: float = 60.0
+    ):
+        """
+        Initialize the writer. The worker thread is started on first use.
+
+        Args:
+            max_queue_size (int): Maximum number of pending records before new ones are dropped.
+            max_batch_bytes (int): Encoded size at which a batch is written without waiting further.
+            flush_interval (float): Maximum time in seconds to wait while filling a batch.
+            idle_close_after (float): Seconds after which an unused file handle is closed.
+        """
+        self.max_batch_bytes = max_batch_bytes
+        self.flush_interval = flush_interval
+        self.idle_close_after = idle_close_after
+        self.dropped = 0
+        self._queue: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue(maxsize=max_queue_size)
+        self._handles: Dict[str, Tuple[BinaryIO, float]] = {}
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, log_file: str, record: Dict[str, Any]) -> bool:
+        """
+        Queue a record to be appended to a JSONL log file.
+
+        Args:
+            log_file (str): Path of the log file to append to.
+            record (Dict[str, Any]): JSON-serializable record.
+
+        Returns:
+            bool: True if the record was queued, False if it was dropped.
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((log_file, record))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until every queued record has been written.
+
+        Args:
+            timeout (float): Maximum time in seconds to wait.
+
+        Returns:
+            bool: True if the queue was fully drained, False on timeout.
+        """
+        if self._thread is None:
+            return True
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="agent-log-writer", daemon=True)
+                self._thread.start()
+                # Drain pending records before the interpreter exits
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            batch, count = self._next_batch()
+            try:
+                self._write_batch(batch)
+                self._close_idle_handles()
+            finally:
+                for _ in range(count):
+                    self._queue.task_done()
+
+    def _next_batch(self) -> Tuple[Dict[str, List[bytes]], int]:
+        """Block for the first record, then collect more until the batch is full or the window closes."""
+        lines_by_file: Dict[str, List[bytes]] = {}
+        log_file, record = self._queue.get()
+        count, size = 1, self._append_line(lines_by_file, log_file, record)
+
+        deadline = time.monotonic() + self.flush_interval
+        while size < self.max_batch_bytes:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                log_file, record = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            count += 1
+            size += self._append_line(lines_by_file, log_file, record)
+        return lines_by_file, count
+
+    @staticmethod
+    def _append_line(lines_by_file: Dict[str, List[bytes]], log_file: str, record: Dict[str, Any]) -> int:
+        try:
+            line = orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+        except (TypeError, ValueError) as e:
+            print(f"Error serializing log record for {log_file}: {e}")
+            return 0
+        lines_by_file.setdefault(log_file, []).append(line)
+        return len(line)
+
+    def _write_batch(self, lines_by_file: Dict[str, List[bytes]]):
+        now = time.monotonic()
+        for log_file, lines in lines_by_file.items():
+            try:
+                handle = self._get_handle(log_file)
+                handle.write(b"".join(lines))
+                handle.flush()
+                self._handles[log_file] = (handle, now)
+            except OSError as e:
+                print(f"Error writing log file {log_file}: {e}")
+                self._close_handle(log_file)
+
+    def _get_handle(self, log_file: str) -> BinaryIO:
+        if log_file in self._handles:
+            return self._handles[log_file][0]
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        handle = open(log_file, "ab", buffering=self.max_batch_bytes)
+        self._handles[log_file] = (handle, time.monotonic())
+        return handle
+
+    def _close_idle_handles(self):
+        cutoff = time.monotonic() - self.idle_close_after
+        for log_file, (_, last_used) in list(self._handles.items()):
+            if last_used < cutoff:
+                self._close_handle(log_file)
+
+    def _close_handle(self, log_file: str):
+        handle, _ = self._handles.pop(log_file, (None, None))
+        if handle is not None:
+            try:
+                handle.close()
+            except OSError:
+                pass
+
+
+# Shared instance used by all agents
+log_writer = BackgroundLogWriter()
@@ -4,7 +4,6 @@ inputs of agent: User message, issue description.
 output json of the agent: Maintenance request confirmation or status.
 method: Logs issues and notifies maintenance staff using LangChain tools.
 """
-import json
 import os
 from datetime import datetime, timezone
 from typing import List, Dict, Any
@@ -13,9 +12,14 @@ from langchain.tools import tool
 from langchain_core.tools import BaseTool
 from langchain_core.pydantic_v1 import BaseModel, Field
 
-from .base_agent import BaseAgent, AgentOutput, LangChainToolWrapper
+from .base_agent import BaseAgent, AgentOutput, LangChainToolWrapper, compile_keyword_pattern
 from .rag_utils import rag_helper
 from .local_llm import LocalLLM
+from .log_writer import log_writer
+
+# Routing keywords for the maintenance agent
+_MAINTENANCE_KEYWORDS = ("broken", "repair", "fix", "not working", "schedule maintenance")
+_MAINTENANCE_KEYWORD_RE = compile_keyword_pattern(_MAINTENANCE_KEYWORDS)
 
 class MaintenanceIssueInput(BaseModel):
     """Input model for maintenance issue reporting."""
@@ -32,8 +36,7 @@ class MaintenanceAgent(BaseAgent):
         self.local_llm = LocalLLM(model, tokenizer)
 
     def should_handle(self, message: str) -> bool:
-        keywords = ["broken", "repair", "fix", "not working", "schedule maintenance"]
-        return any(keyword in message.lower() for keyword in keywords)
+        return _MAINTENANCE_KEYWORD_RE.search(message) is not None
 
     def get_available_tools(self) -> List[BaseTool]:
         """
@@ -70,14 +73,17 @@ class MaintenanceAgent(BaseAgent):
         # Determine and create tool calls
         tool_calls = self._generate_tool_calls(message)
 
+        # One timestamp shared by the notification and the log record
+        timestamp = datetime.now(timezone.utc).isoformat()
+
         # Create and save notification
-        notification = self._create_notification(message, tool_calls)
+        notification = self._create_notification(message, tool_calls, timestamp)
         self._save_to_log({
             "input": message,
             "response": response,
             "notification": notification,
             "tool_calls": tool_calls,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": timestamp,
             "agent": self.name
         })
 
@@ -108,8 +114,9 @@ class MaintenanceAgent(BaseAgent):
     def _generate_tool_calls(self, message: str) -> List[Dict[str, Any]]:
         """Generate appropriate tool calls based on message content."""
         tool_calls = []
+        message_lower = message.lower()
         
-        if "broken" in message.lower():
+        if "broken" in message_lower:
             tool_calls.append({
                 "tool_name": "report_maintenance_issue",
                 "parameters": {
@@ -117,7 +124,7 @@ class MaintenanceAgent(BaseAgent):
                     "description": message
                 }
             })
-        elif "not working" in message.lower():
+        elif "not working" in message_lower:
             tool_calls.append({
                 "tool_name": "report_maintenance_issue",
                 "parameters": {
@@ -143,14 +150,14 @@ class MaintenanceAgent(BaseAgent):
 
         return tool_calls
 
-    def _create_notification(self, message: str, tool_calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _create_notification(self, message: str, tool_calls: List[Dict[str, Any]], timestamp: str) -> Dict[str, Any]:
         """Create a notification dictionary."""
         issue_type = tool_calls[0].get('parameters', {}).get('issue_type', 'general')
         return {
             "type": "maintenance_request",
             "issue_type": issue_type,
             "description": message,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": timestamp,
             "agent": self.name
         }
 
@@ -212,12 +219,10 @@ class MaintenanceAgent(BaseAgent):
     def _save_to_log(self, data: Dict[str, Any]):
         """Save maintenance logs to a file."""
         log_dir = os.path.join("logs", "maintenance")
-        os.makedirs(log_dir, exist_ok=True)
         log_file = os.path.join(log_dir, f"maintenance_log_{datetime.now().strftime('%Y%m%d')}.jsonl")
         
-        with open(log_file, "a") as f:
-            json.dump(data, f)
-            f.write("\n")
+        # Written asynchronously so disk I/O stays off the request path
+        log_writer.submit(log_file, data)
 
     def get_keywords(self) -> List[str]:
-        return ["broken", "repair", "fix", "not working", "schedule maintenance"]
\ No newline at end of file
+        return list(_MAINTENANCE_KEYWORDS)
\ No newline at end of file
@@ -1,5 +1,23 @@
 import os
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
+
+# Common hotel-related keywords to look for
+_HOTEL_KEYWORDS = frozenset([
+    "spa", "wellness", "massage", "facial", "sauna", "steam", "treatment",
+    "breakfast", "buffet", "restaurant", "dining", "food", "menu",
+    "check-in", "check-out", "reservation", "booking", "cancel",
+    "pool", "gym", "fitness", "parking", "wifi", "internet",
+    "pet", "smoking", "policy", "fee", "charge", "payment",
+    "room", "suite", "bed", "accessibility", "service", "hours",
+    "open", "time", "available", "price", "cost", "rate"
+])
+
+# Priority keywords (ordered by importance)
+_PRIORITY_KEYWORDS = (
+    "spa", "wellness", "massage", "breakfast", "buffet", "restaurant",
+    "check-in", "check-out", "reservation", "booking", "pool", "gym",
+    "pet", "smoking", "wifi", "internet", "room", "suite"
+)
 
 class ImprovedRAGHelper:
     def __init__(self, file_paths: List[str]):
@@ -15,6 +33,9 @@ class ImprovedRAGHelper:
         for file_path in file_paths:
             full_path = os.path.join(self.base_dir, file_path)
             self.file_contents[file_path] = self.load_data(full_path)
+        
+        # Split, lowercase and tokenize the documents once instead of per query
+        self.sections = self._index_sections()
     
     def load_data(self, file_path: str) -> str:
         """Load data from a file"""
@@ -24,6 +45,38 @@ class ImprovedRAGHelper:
         with open(file_path, 'r', encoding='utf-8') as f:
             return f.read()
     
+    def _index_sections(self) -> List[Tuple[Optional[str], str, List[Tuple[str, str, frozenset]]]]:
+        """
+        Pre-process the loaded files into sections for scoring
+        
+        Returns:
+            List of (header, header_lower, lines) tuples, one per non-empty section.
+            header is None when the section has no "Title:" style first line, and
+            lines holds (line, line_lower, line_words) for every other non-empty line.
+        """
+        sections = []
+        for content in self.file_contents.values():
+            for section in content.split('\n\n'):
+                if not section.strip():
+                    continue
+                
+                section_lines = section.split('\n')
+                header_lower = section_lines[0].lower()
+                header = None
+                if ':' in header_lower:
+                    header = section_lines[0]
+                    section_lines = section_lines[1:]
+                
+                lines = []
+                for line in section_lines:
+                    if not line.strip():
+                        continue
+                    line_lower = line.lower()
+                    lines.append((line, line_lower, frozenset(line_lower.split())))
+                
+                sections.append((header, header_lower if header is not None else "", lines))
+        return sections
+    
     def get_relevant_passages(self, query: str, min_score: float = 0.4, k: int = 3) -> List[Tuple[str, float]]:
         """
         Get passages relevant to the query from all loaded files
@@ -40,76 +93,53 @@ class ImprovedRAGHelper:
             return []
             
         # Preprocess query
-        query_words = set(query.lower().split())
-        query_keywords = self._extract_keywords(query.lower())
+        query_lower = query.lower()
+        query_words = set(query_lower.split())
+        query_keywords = self._extract_keywords(query_lower)
         
         # Extract the most important keyword for focused search
-        primary_keyword = self._get_primary_keyword(query.lower())
+        primary_keyword = self._get_primary_keyword(query_lower)
         
         all_scored_lines = []
         
-        # Process each file
-        for file_path, content in self.file_contents.items():
-            # First split into sections
-            sections = content.split('\n\n')
+        # Process each pre-split section of the loaded files
+        for section_header, header_lower, section_lines in self.sections:
+            # Check if section header is highly relevant
+            header_relevant = False
+            if section_header is not None:
+                for keyword in query_keywords:
+                    if keyword in header_lower:
+                        header_relevant = True
+                        break
+                
+                # Only include header if it's directly relevant
+                if header_relevant:
+                    all_scored_lines.append((section_header, 0.9))  # High score for relevant headers
             
-            for section in sections:
-                if not section.strip():
-                    continue
+            # Process each line in the section
+            for line, line_lower, line_words in section_lines:
+                # Basic word overlap
+                word_overlap_score = len(query_words.intersection(line_words)) / len(query_words) if query_words else 0
                 
-                # Get section header if present
-                section_lines = section.split('\n')
-                section_header = section_lines[0].lower() if section_lines else ""
-                has_header = ':' in section_header
+                # Keyword match (weighted higher)
+                keyword_score = 0
+                for keyword in query_keywords:
+                    if keyword in line_lower:
+                        keyword_score += 1
+                keyword_score = keyword_score / len(query_keywords) if query_keywords else 0
                 
-                # Check if section header is highly relevant
-                header_relevant = False
-                if has_header:
-                    for keyword in query_keywords:
-                        if keyword in section_header:
-                            header_relevant = True
-                            break
+                # Primary keyword exact match (highest weight)
+                primary_match = 1.0 if primary_keyword and primary_keyword in line_lower else 0
                 
-                # Process each line in the section
-                for i, line in enumerate(section_lines):
-                    # Skip empty lines
-                    if not line.strip():
-                        continue
-                        
-                    line_lower = line.lower()
-                    
-                    # Skip processing section header separately
-                    if i == 0 and has_header:
-                        # Only include header if it's directly relevant
-                        if header_relevant:
-                            all_scored_lines.append((line, 0.9))  # High score for relevant headers
-                        continue
-                    
-                    # Calculate line relevance
-                    line_words = set(line_lower.split())
-                    
-                    # Basic word overlap
-                    word_overlap_score = len(query_words.intersection(line_words)) / len(query_words) if query_words else 0
-                    
-                    # Keyword match (weighted higher)
-                    keyword_score = 0
-                    for keyword in query_keywords:
-                        if keyword in line_lower:
-                            keyword_score += 1
-                    keyword_score = keyword_score / len(query_keywords) if query_keywords else 0
-                    
-                    # Primary keyword exact match (highest weight)
-                    primary_match = 1.0 if primary_keyword and primary_keyword in line_lower else 0
-                    
-                    # Header context bonus (small bonus if the section header is relevant)
-                    header_bonus = 0.1 if header_relevant else 0
-                    
-                    # Combined score (weighted)
-                    combined_score = (0.2 * word_overlap_score) + (0.3 * keyword_score) + (0.4 * primary_match) + header_bonus
+                # Header context bonus (small bonus if the section header is relevant)
+                header_bonus = 0.1 if header_relevant else 0
                 
-                    # Only include lines that meet the threshold
-                    if combined_score >= min_score:
-                        all_scored_lines.append((line, combined_score))
+                # Combined score (weighted)
+                combined_score = (0.2 * word_overlap_score) + (0.3 * keyword_score) + (0.4 * primary_match) + header_bonus
+            
+                # Only include lines that meet the threshold
+                if combined_score >= min_score:
+                    all_scored_lines.append((line, combined_score))
         
         # Sort by score and return top k lines
         sorted_lines = sorted(all_scored_lines, key=lambda x: x[1], reverse=True)[:k]
@@ -144,24 +174,13 @@ class ImprovedRAGHelper:
     
     def _extract_keywords(self, query: str) -> List[str]:
         """Extract important keywords from the query"""
-        # Common hotel-related keywords to look for
-        hotel_keywords = [
-            "spa", "wellness", "massage", "facial", "sauna", "steam", "treatment",
-            "breakfast", "buffet", "restaurant", "dining", "food", "menu",
-            "check-in", "check-out", "reservation", "booking", "cancel",
-            "pool", "gym", "fitness", "parking", "wifi", "internet",
-            "pet", "smoking", "policy", "fee", "charge", "payment",
-            "room", "suite", "bed", "accessibility", "service", "hours",
-            "open", "time", "available", "price", "cost", "rate"
-        ]
-        
         # Extract words from query that match our keywords
         query_words = query.split()
         extracted_keywords = []
         
         for word in query_words:
             word = word.strip(".,?!").lower()
-            if word in hotel_keywords:
+            if word in _HOTEL_KEYWORDS:
                 extracted_keywords.append(word)
         
         # If no keywords found, use all words as fallback
@@ -172,15 +191,8 @@ class ImprovedRAGHelper:
         
     def _get_primary_keyword(self, query: str) -> str:
         """Extract the most important keyword from the query"""
-        # Priority keywords (ordered by importance)
-        priority_keywords = [
-            "spa", "wellness", "massage", "breakfast", "buffet", "restaurant",
-            "check-in", "check-out", "reservation", "booking", "pool", "gym",
-            "pet", "smoking", "wifi", "internet", "room", "suite"
-        ]
-        
         # Check for each priority keyword in the query
-        for keyword in priority_keywords:
+        for keyword in _PRIORITY_KEYWORDS:
             if keyword in query:
                 return keyword
                 
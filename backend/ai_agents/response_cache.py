@@ -0,0 +1,106 @@
+"""
+Short-lived cache for generated agent responses.
+
+Guests often ask the same FAQ-style question within minutes of each other.
+Caching the generated answer for a normalized message lets an agent skip
+model inference for those repeats.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# Messages shorter than this, or referring back to earlier turns, depend on the
+# conversation, so their answers must not be shared between guests
+_MIN_CACHEABLE_WORDS = 4
+_CONTEXT_REFERENCE_RE = re.compile(
+    r"\b(it|its|that|this|these|those|them|they|one|yes|no|sure|ok|okay|same|again|also|too|more|else)\b",
+    re.IGNORECASE
+)
+
+
+def normalize_message(message: str) -> str:
+    """
+    Normalize a guest message for use as a cache key.
+
+    Args:
+        message (str): The raw guest message.
+
+    Returns:
+        str: Lowercased message with collapsed whitespace and no trailing punctuation.
+    """
+    return _WHITESPACE_RE.sub(" ", message.lower()).strip().rstrip(".?! ")
+
+
+def is_self_contained(message: str) -> bool:
+    """
+    Check whether a message can be answered without the conversation history.
+
+    Args:
+        message (str): The guest message.
+
+    Returns:
+        bool: True if the message is long enough and does not refer back to earlier turns.
+    """
+    return len(message.split()) >= _MIN_CACHEABLE_WORDS and _CONTEXT_REFERENCE_RE.search(message) is None
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache whose entries expire after a fixed time-to-live.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum number of cached responses before the least recently used is evicted.
+            ttl (float): Seconds a cached response stays valid.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """
+        Look up a cached response.
+
+        Args:
+            key (Hashable): Cache key.
+
+        Returns:
+            Optional[str]: The cached response, or None if missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            response, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def put(self, key: Hashable, response: str):
+        """
+        Store a response, evicting the least recently used entry when full.
+
+        Args:
+            key (Hashable): Cache key.
+            response (str): Generated response to cache.
+        """
+        with self._lock:
+            self._entries[key] = (response, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            self._entries.clear()
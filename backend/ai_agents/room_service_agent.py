@@ -4,15 +4,22 @@ inputs of agent: User message, order details.
 output json of the agent: Order confirmation or status.
 method: Processes orders and updates inventory.
 """
-import json
 import os
-import re
 from typing import List, Dict, Any
 from datetime import datetime, timezone, timedelta
-from .base_agent import BaseAgent, AgentOutput, ToolDefinition
+from .base_agent import BaseAgent, AgentOutput, ToolDefinition, compile_keyword_pattern
 from .rag_utils import rag_helper
+from .conversation_memory import anonymize_personal_data
+from .log_writer import log_writer
 from langchain.tools import tool
 
+# Routing keywords for the room service agent
+_ROOM_SERVICE_KEYWORDS = ("room service", "food", "drink", "towel", "order", "burger", "fries", "breakfast", "buffet")
+_ROOM_SERVICE_KEYWORD_RE = compile_keyword_pattern(_ROOM_SERVICE_KEYWORDS)
+# Order intents checked in process(); towels take precedence over food
+_TOWEL_RE = compile_keyword_pattern(("towel",))
+_FOOD_ORDER_RE = compile_keyword_pattern(("food", "burger", "fries", "order"))
+
 class RoomServiceAgent(BaseAgent):
     def __init__(self, name: str, model, tokenizer):
         super().__init__(name, model, tokenizer)
@@ -22,8 +29,7 @@ class RoomServiceAgent(BaseAgent):
         self.notifications = []
 
     def should_handle(self, message: str) -> bool:
-        keywords = ["room service", "food", "drink", "towel", "order", "burger", "fries", "breakfast", "buffet"]
-        return any(keyword in message.lower() for keyword in keywords)
+        return _ROOM_SERVICE_KEYWORD_RE.search(message) is not None
 
     def process(self, message: str, memory) -> Dict[str, Any]:
         # Get only highly relevant lines with a higher threshold
@@ -48,7 +54,7 @@ class RoomServiceAgent(BaseAgent):
         tool_calls = []
         
         # Check for specific service requests
-        if "towel" in message.lower():
+        if _TOWEL_RE.search(message):
             tool_calls.append({
                 "tool_name": "place_order",
                 "parameters": {
@@ -56,7 +62,7 @@ class RoomServiceAgent(BaseAgent):
                     "quantity": 1
                 }
             })
-        elif any(food in message.lower() for food in ["food", "burger", "fries", "order"]):
+        elif _FOOD_ORDER_RE.search(message):
             tool_calls.append({
                 "tool_name": "place_order",
                 "parameters": {
@@ -75,15 +81,18 @@ class RoomServiceAgent(BaseAgent):
         # Add notifications
         self.notifications.extend(tool_calls)
 
+        # One clock read shared by the timestamp and the retention period
+        now = datetime.now(timezone.utc)
+
         # Save the structured output to a log file with GDPR compliance
         self._save_to_log({
             "input": self._anonymize_personal_data(message),  # Anonymize personal data
             "response": response,
             "tool_calls": tool_calls,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": now.isoformat(),
             "agent": self.name,
             "data_purpose": "customer_service",  # Purpose limitation
-            "retention_period": (datetime.now(timezone.utc) + timedelta(days=90)).isoformat(),  # Storage limitation
+            "retention_period": (now + timedelta(days=90)).isoformat(),  # Storage limitation
             "consent_reference": memory.conversation_id  # Link to consent record
         })
 
@@ -115,7 +124,7 @@ class RoomServiceAgent(BaseAgent):
             return super().handle_tool_call(tool_name, **kwargs)
 
     def get_keywords(self) -> List[str]:
-        return ["room service", "food", "drink", "towel", "order", "burger", "fries", "breakfast", "buffet"]
+        return list(_ROOM_SERVICE_KEYWORDS)
 
     def _anonymize_personal_data(self, text: str) -> str:
         """
@@ -127,39 +136,7 @@ class RoomServiceAgent(BaseAgent):
         Returns:
             Anonymized text with personal data replaced
         """
-        # Patterns for common personal data
-        patterns = [
-            # Phone numbers (various formats)
-            (r'\b(?:\+\d{1,3}[-\s]?)?\(?\d{3}\)?[-\s]?\d{3}[-\s]?\d{4}\b', '[PHONE_NUMBER]'),
-            
-            # Email addresses
-            (r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL_ADDRESS]'),
-            
-            # Credit card numbers (simplified pattern)
-            (r'\b(?:\d{4}[-\s]?){3}\d{4}\b', '[PAYMENT_CARD]'),
-            
-            # Names (common title + name pattern, simplified)
-            (r'\b(?:Mr\.|Mrs\.|Ms\.|Dr\.|Prof\.)\s+[A-Z][a-z]+\b', '[NAME]'),
-            
-            # Room numbers
-            (r'\b(?:room|suite)\s+\d+\b', '[ROOM_NUMBER]'),
-            
-            # Addresses (simplified pattern)
-            (r'\b\d+\s+[A-Za-z]+\s+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr)\b', '[ADDRESS]'),
-            
-            # Social Security Numbers (US)
-            (r'\b\d{3}-\d{2}-\d{4}\b', '[SSN]'),
-            
-            # Passport numbers (simplified pattern)
-            (r'\b[A-Z]{1,2}\d{6,9}\b', '[PASSPORT_NUMBER]')
-        ]
-        
-        # Apply each pattern
-        anonymized_text = text
-        for pattern, replacement in patterns:
-            anonymized_text = re.sub(pattern, replacement, anonymized_text, flags=re.IGNORECASE)
-            
-        return anonymized_text
+        return anonymize_personal_data(text)
 
     def _save_to_log(self, data: Dict[str, Any]):
         """
@@ -184,29 +161,29 @@ class RoomServiceAgent(BaseAgent):
         if "tool_calls" in data and data["tool_calls"]:
             clean_data["tool_calls"] = data["tool_calls"]
         
+        now = datetime.now(timezone.utc)
+        
         # Add metadata for GDPR compliance
         clean_data["gdpr_metadata"] = {
             "data_controller": "Hotel AI System",
             "legal_basis": "legitimate_interest",  # or "consent", "contract", etc.
             "data_subject_rights_url": "/api/user/data/rights",
-            "logged_at": datetime.now(timezone.utc).isoformat()
+            "logged_at": now.isoformat()
         }
         
         # Create directory structure that separates data by date for easier retention management
-        current_date = datetime.now().strftime('%Y%m%d')
-        year_month = datetime.now().strftime('%Y-%m')
+        local_now = now.astimezone()
+        current_date = local_now.strftime('%Y%m%d')
+        year_month = local_now.strftime('%Y-%m')
         
         # Organize logs by year-month for easier retention management
         log_dir = os.path.join("logs", "room_service", year_month)
-        os.makedirs(log_dir, exist_ok=True)
         
         # Use a unique identifier in the filename to avoid conflicts
         log_file = os.path.join(log_dir, f"room_service_log_{current_date}.jsonl")
         
-        # Append to the log file
-        with open(log_file, "a") as f:
-            json.dump(clean_data, f)
-            f.write("\n")
+        # Written asynchronously so disk I/O stays off the request path
+        log_writer.submit(log_file, clean_data)
 
     @tool
     def check_menu_availability(self, item_type: str = None) -> Dict[str, Any]:
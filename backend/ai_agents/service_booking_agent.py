@@ -1,5 +1,4 @@
 from typing import List, Dict, Any
-import os
 import re
 """
 aim of the agent: Manages service bookings like spa and gym sessions.
@@ -9,7 +8,6 @@ method: Checks availability and confirms bookings.
 """
 
 from typing import List, Dict, Any
-import os
 import re
 import json
 from datetime import datetime, timedelta
@@ -23,8 +21,6 @@ class ServiceBookingAgent(BaseAgent):
         self.description = "Manages bookings for hotel facilities like meeting rooms and co-working spaces."
         self.system_prompt = "You are a hotel services booking AI. Assist guests with reserving meeting rooms, workspaces, and conference halls."
         self.priority = 6  # High priority for service bookings
-        self.hotel_info_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'hotel_info', 'hotel_information.txt')
-        self.hotel_policy_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'hotel_info', 'hotel_policies.txt')
         
         # Predefined services with their availability slots
         self.services = {
@@ -70,20 +66,15 @@ class ServiceBookingAgent(BaseAgent):
             r'\b(spa)\b', r'\b(gym)\b', r'\b(meditation)\b', 
             r'\b(wellness)\b', r'\b(book)\s*(service|room|session)\b'
         ]
-        return any(re.search(pattern, message.lower()) for pattern in service_patterns)
+        message_lower = message.lower()
+        return any(re.search(pattern, message_lower) for pattern in service_patterns)
 
     def _get_hotel_context(self, query: str) -> str:
         """Use RAG to retrieve relevant hotel information"""
         try:
-            # Read hotel information and policies
-            with open(self.hotel_info_path, 'r') as f:
-                hotel_info = f.read()
-            with open(self.hotel_policy_path, 'r') as f:
-                hotel_policies = f.read()
-            
-            # Combine and use RAG to get relevant passages
-            combined_text = hotel_info + "\n\n" + hotel_policies
-            relevant_passages = rag_helper.get_relevant_passages(query, combined_text, k=3)
+            # The shared RAG helper already holds the hotel information and
+            # policies in memory, so no files are read per request
+            relevant_passages = rag_helper.get_relevant_passages(query, k=3)
             
             return "\n".join([passage for passage, _ in relevant_passages])
         except Exception as e:
@@ -5,22 +5,25 @@ output json of the agent: Emergency alert and notification status.
 method: Triggers immediate staff notification.
 """
 from typing import List, Dict, Any
-from .base_agent import BaseAgent
+from .base_agent import BaseAgent, compile_keyword_pattern
 import json
 from datetime import datetime, timezone
 
+_SOS_KEYWORDS = (
+    "fire", "emergency", "help", "panic attack",
+    "medical help", "urgent", "danger", "hurt",
+    "bleeding", "choking", "unconscious",
+    "need assistance", "sos", "critical"
+)
+_SOS_KEYWORD_RE = compile_keyword_pattern(_SOS_KEYWORDS)
+_MEDICAL_KEYWORD_RE = compile_keyword_pattern(("medical help", "bleeding", "hurt", "choking", "unconscious"))
+
 class SOSAgent(BaseAgent):
     def should_handle(self, message: str) -> bool:
         """
         Determine if the message is an SOS emergency
         """
-        sos_keywords = [
-            "fire", "emergency", "help", "panic attack", 
-            "medical help", "urgent", "danger", "hurt", 
-            "bleeding", "choking", "unconscious", 
-            "need assistance", "sos", "critical"
-        ]
-        return any(keyword in message.lower() for keyword in sos_keywords)
+        return _SOS_KEYWORD_RE.search(message) is not None
 
     def process(self, message: str, memory) -> Dict[str, Any]:
         """
@@ -64,7 +67,7 @@ class SOSAgent(BaseAgent):
             return "FIRE"
         elif "panic attack" in message_lower:
             return "MEDICAL_MENTAL_HEALTH"
-        elif any(keyword in message_lower for keyword in ["medical help", "bleeding", "hurt", "choking", "unconscious"]):
+        elif _MEDICAL_KEYWORD_RE.search(message_lower):
             return "MEDICAL_EMERGENCY"
         elif "danger" in message_lower:
             return "PERSONAL_SAFETY"
@@ -7,8 +7,12 @@ method: Uses keyword matching to select agents.
 from typing import List, Dict, Any
 from .base_agent import BaseAgent, AgentOutput, ToolDefinition
 from .rag_utils import rag_helper
+from .response_cache import ResponseCache, is_self_contained, normalize_message
 import re
 
+# Recent routing decisions keyed by normalized guest message
+_ROUTING_CACHE = ResponseCache(max_entries=5000, ttl=600.0)
+
 class SupervisorAgent(BaseAgent):
     def __init__(self, name: str, model, tokenizer):
         super().__init__(name, model, tokenizer)
@@ -66,11 +70,19 @@ class SupervisorAgent(BaseAgent):
         return True  # Always handle for routing decision
     
     def process(self, message: str, memory) -> Dict[str, Any]:
-        agent_names = [agent.name for agent in self.agents]
-        system_prompt = self.load_prompt("supervisor_prompt.txt", context=', '.join(agent_names))
-        prompt = f"Message: {message}\nAgent to handle:"
-        selected_agent_name = self.generate_response(prompt, memory, system_prompt).strip()
+        # Repeats of a self-contained question reuse the earlier routing decision
+        cache_key = normalize_message(message) if is_self_contained(message) else None
+        selected_agent_name = _ROUTING_CACHE.get(cache_key) if cache_key else None
+        from_cache = selected_agent_name is not None
+        if not from_cache:
+            agent_names = [agent.name for agent in self.agents]
+            system_prompt = self.load_prompt("supervisor_prompt.txt", context=', '.join(agent_names))
+            prompt = f"Message: {message}\nAgent to handle:"
+            selected_agent_name = self.generate_response(prompt, memory, system_prompt).strip()
         selected_agent = next((agent for agent in self.agents if agent.name == selected_agent_name), None)
+        if selected_agent and cache_key and not from_cache:
+            # Only a valid agent name is cached; unparseable output is retried next time
+            _ROUTING_CACHE.put(cache_key, selected_agent_name)
         if selected_agent:
             response = selected_agent.process(message, memory)
             # Ensure the response includes the routing information
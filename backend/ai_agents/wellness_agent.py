@@ -4,16 +4,57 @@ inputs of agent: User message, service type.
 output json of the agent: Service availability or booking status.
 method: Checks schedules and confirms bookings.
 """
-import json
 import os
 import re
-from typing import List, Dict, Any
-from datetime import datetime, timezone
-from .base_agent import BaseAgent, AgentOutput, ToolDefinition
+import secrets
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import date, datetime, timezone, time as dt_time
+from .base_agent import BaseAgent, AgentOutput, ToolDefinition, compile_keyword_pattern
 from .rag_utils import rag_helper
+from .log_writer import log_writer
+from .response_cache import ResponseCache, is_self_contained, normalize_message
 from langchain.tools import tool
 
+# Routing keywords for the wellness agent
+_WELLNESS_KEYWORDS = ("wellness", "meditation", "yoga", "fitness", "spa", "relax", "massage", "facial", "sauna", "steam room")
+_WELLNESS_KEYWORD_RE = compile_keyword_pattern(_WELLNESS_KEYWORDS)
+_SPA_TIMING_RE = compile_keyword_pattern(("spa time", "spa hours", "spa opening", "spa timing"))
+_BOOKING_RE = compile_keyword_pattern(("book", "reserve", "schedule"))
+# Messages that depend on whether the spa is open right now
+_AVAILABILITY_RE = compile_keyword_pattern(("book", "reserve", "schedule", "available", "open", "hours", "time", "timing"))
+
+# Wellness services offered by the spa; also compiled into _SERVICE_RE
+_WELLNESS_SERVICES = ("massage", "facial", "body treatment", "yoga", "meditation", "fitness")
+_SERVICE_RE = compile_keyword_pattern(_WELLNESS_SERVICES)
+_TIME_RE = re.compile(r'\b(\d{1,2}(?:am|pm))\b', re.IGNORECASE)
+# Clock times such as "9:00 AM" inside spa opening-hours passages
+_CLOCK_RE = re.compile(r'(\d{1,2}):(\d{2})\s*(am|pm)', re.IGNORECASE)
+
+# Default spa hours used when the hotel information does not list them
+_DEFAULT_SPA_OPEN = dt_time(9, 0)
+_DEFAULT_SPA_CLOSE = dt_time(20, 0)
+
+# Recently generated FAQ answers keyed by normalized guest message
+_RESPONSE_CACHE = ResponseCache(max_entries=1024, ttl=300.0)
+
+@lru_cache(maxsize=1)
+def _spa_hours_passages() -> Tuple[Tuple[str, float], ...]:
+    """
+    Return the hotel information passages describing the spa opening hours.
+    
+    rag_helper loads its files once at import, so the result of this fixed
+    query cannot change while the process runs and is computed only once.
+    
+    Returns:
+        Tuple[Tuple[str, float], ...]: (passage, score) pairs for the spa hours query.
+    """
+    return tuple(rag_helper.get_relevant_passages("spa hours opening", min_score=0.4))
+
 class WellnessAgent(BaseAgent):
+    # Parsed spa opening window as (day, opening_time, closing_time), shared by all instances
+    _hours_cache: Optional[Tuple[date, dt_time, dt_time]] = None
+
     def __init__(self, name: str, model, tokenizer):
         super().__init__(name, model, tokenizer)
         self.description = "Handles wellness service bookings such as spa, yoga, meditation, and fitness activities."
@@ -22,15 +63,14 @@ class WellnessAgent(BaseAgent):
         self.notifications = []
 
     def should_handle(self, message: str) -> bool:
-        keywords = ["wellness", "meditation", "yoga", "fitness", "spa", "relax", "massage", "facial", "sauna", "steam room"]
-        return any(keyword in message.lower() for keyword in keywords)
+        return _WELLNESS_KEYWORD_RE.search(message) is not None
 
     def process(self, message: str, memory) -> Dict[str, Any]:
         # Get only highly relevant lines with a higher threshold for spa/wellness queries
         relevant_lines = rag_helper.get_relevant_passages(message, min_score=0.5, k=5)
         
         # Check if the query is specifically about spa timings
-        is_spa_timing_query = any(keyword in message.lower() for keyword in ["spa time", "spa hours", "spa opening", "spa timing"])
+        is_spa_timing_query = _SPA_TIMING_RE.search(message) is not None
         
         # Only include context if we found relevant information
         if relevant_lines:
@@ -66,14 +106,25 @@ class WellnessAgent(BaseAgent):
                 "Offer to connect them with our wellness team for specific details."
             )
 
-        response = self.generate_response(message, memory, system_prompt)
+        is_booking = _BOOKING_RE.search(message) is not None
+        
+        if relevant_lines and not is_booking and is_self_contained(message):
+            # Self-contained FAQ answers come from the hotel information alone, so they are
+            # generated without the conversation history and reused for repeats of the same question
+            cache_key = normalize_message(message)
+            response = _RESPONSE_CACHE.get(cache_key)
+            if response is None:
+                response = self.generate_response(message, None, system_prompt)
+                _RESPONSE_CACHE.put(cache_key, response)
+        else:
+            response = self.generate_response(message, memory, system_prompt)
 
         # Prepare tool calls
         tool_calls = []
         service_type = self.extract_service_type(message)
         
         # Check if the request is for booking a service
-        if any(keyword in message.lower() for keyword in ["book", "reserve", "schedule"]):
+        if is_booking:
             tool_calls.append({
                 "tool_name": "book_session",
                 "parameters": {
@@ -91,15 +142,21 @@ class WellnessAgent(BaseAgent):
                 }
             })
 
-        # Check if the spa is available based on the current time
-        spa_available = self.check_spa_availability()
+        # Only look up spa hours when the guest is booking or asking about availability
+        if _AVAILABILITY_RE.search(message):
+            availability = "available" if self.check_spa_availability() else "not available"
+        else:
+            availability = "unknown"
+
+        # One timestamp shared by the notification and the log record
+        timestamp = datetime.now(timezone.utc).isoformat()
 
         # Create a notification for the booking
         notification = {
             "type": "wellness_booking",
             "service": service_type,
-            "availability": "available" if spa_available else "not available",
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "availability": availability,
+            "timestamp": timestamp,
             "agent": self.name
         }
         self.notifications.append(notification)
@@ -110,7 +167,7 @@ class WellnessAgent(BaseAgent):
             "response": response,
             "notification": notification,
             "tool_calls": tool_calls,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": timestamp,
             "agent": self.name
         })
 
@@ -123,16 +180,14 @@ class WellnessAgent(BaseAgent):
         ]
 
     def get_keywords(self) -> List[str]:
-        return ["wellness", "meditation", "yoga", "fitness", "spa", "relax", "massage", "facial", "sauna", "steam room"]
+        return list(_WELLNESS_KEYWORDS)
 
     def _save_to_log(self, data: Dict[str, Any]):
         log_dir = os.path.join("logs", "wellness")
-        os.makedirs(log_dir, exist_ok=True)
         log_file = os.path.join(log_dir, f"wellness_log_{datetime.now().strftime('%Y%m%d')}.jsonl")
         
-        with open(log_file, "a") as f:
-            json.dump(data, f)
-            f.write("\n")
+        # Written asynchronously so disk I/O stays off the request path
+        log_writer.submit(log_file, data)
 
     @tool
     def check_service_availability(self, service_type: str = None) -> Dict[str, Any]:
@@ -174,7 +229,7 @@ class WellnessAgent(BaseAgent):
         """
         spa_available = self.check_spa_availability()
         if spa_available:
-            booking_id = f"WB{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            booking_id = self._generate_booking_id()
             return {
                 "booking_id": booking_id,
                 "status": "confirmed",
@@ -187,6 +242,10 @@ class WellnessAgent(BaseAgent):
                 "message": "The spa is currently closed. Please check our opening hours."
             }
 
+    def _generate_booking_id(self) -> str:
+        """Generate a unique wellness booking ID"""
+        return f"WB{secrets.token_hex(4).upper()}"
+
     def check_spa_availability(self) -> bool:
         """
         Check if the spa is currently available.
@@ -194,36 +253,76 @@ class WellnessAgent(BaseAgent):
         Returns:
             bool: True if spa is open, False otherwise.
         """
+        opening_time, closing_time = self._get_spa_hours()
+        current_time = datetime.now().time()
+        return opening_time <= current_time <= closing_time
+
+    def _get_spa_hours(self) -> Tuple[dt_time, dt_time]:
+        """
+        Get today's spa opening and closing times.
+        
+        The hours are parsed from the hotel information at most once per
+        calendar day and cached on the class.
+        
+        Returns:
+            Tuple[dt_time, dt_time]: Opening and closing time.
+        """
+        today = date.today()
+        cached = WellnessAgent._hours_cache
+        if cached is not None and cached[0] == today:
+            return cached[1], cached[2]
+
         # Get spa hours from the information
-        spa_passages = rag_helper.get_relevant_passages("spa hours opening", min_score=0.4)
+        spa_passages = _spa_hours_passages()
         
         # Default hours if not found in passages
-        opening_time = datetime.strptime("9:00 AM", "%I:%M %p").time()
-        closing_time = datetime.strptime("8:00 PM", "%I:%M %p").time()
+        opening_time = _DEFAULT_SPA_OPEN
+        closing_time = _DEFAULT_SPA_CLOSE
         
         # Try to extract actual hours from passages
-        if spa_passages:
-            for passage, _ in spa_passages:
-                if "spa:" in passage.lower() and "open" in passage.lower():
-                    # Try to extract hours from the passage
-                    try:
-                        hours_text = passage.lower().split("open")[1].split("\n")[0].strip()
-                        if "-" in hours_text:
-                            hours = hours_text.split("-")
-                            opening_str = hours[0].strip()
-                            closing_str = hours[1].strip()
-                            
-                            # Parse times
-                            if "am" in opening_str or "pm" in opening_str:
-                                opening_time = datetime.strptime(opening_str, "%I:%M %p").time()
-                            if "am" in closing_str or "pm" in closing_str:
-                                closing_time = datetime.strptime(closing_str, "%I:%M %p").time()
-                    except:
-                        # If parsing fails, use defaults
-                        pass
+        for passage, _ in spa_passages:
+            passage_lower = passage.lower()
+            if "spa:" in passage_lower and "open" in passage_lower:
+                # Try to extract hours from the passage
+                try:
+                    hours_text = passage_lower.split("open")[1].split("\n")[0].strip()
+                    if "-" in hours_text:
+                        hours = hours_text.split("-")
+                        opening_str = hours[0].strip()
+                        closing_str = hours[1].strip()
+                        
+                        # Parse times
+                        opening_time = self._parse_clock_time(opening_str) or opening_time
+                        closing_time = self._parse_clock_time(closing_str) or closing_time
+                except (ValueError, IndexError):
+                    # If parsing fails, use defaults
+                    pass
         
-        current_time = datetime.now().time()
-        return opening_time <= current_time <= closing_time
+        WellnessAgent._hours_cache = (today, opening_time, closing_time)
+        return opening_time, closing_time
+
+    @staticmethod
+    def _parse_clock_time(text: str) -> Optional[dt_time]:
+        """
+        Parse a 12-hour clock time such as "9:00 am" from text.
+        
+        Args:
+            text (str): Text containing the time.
+        
+        Returns:
+            Optional[dt_time]: The parsed time, or None if no valid time was found.
+        """
+        clock_match = _CLOCK_RE.search(text)
+        if not clock_match:
+            return None
+        hour, minute = int(clock_match.group(1)), int(clock_match.group(2))
+        if not 1 <= hour <= 12 or minute > 59:
+            return None
+        if clock_match.group(3).lower() == "pm":
+            hour = hour % 12 + 12
+        else:
+            hour = hour % 12
+        return dt_time(hour, minute)
 
     def _get_available_services(self) -> List[str]:
         """
@@ -232,7 +331,7 @@ class WellnessAgent(BaseAgent):
         Returns:
             List[str]: Available wellness services.
         """
-        return ["massage", "facial", "body treatment", "yoga", "meditation", "fitness"]
+        return list(_WELLNESS_SERVICES)
 
     def extract_service_type(self, message: str) -> str:
         """
@@ -244,11 +343,8 @@ class WellnessAgent(BaseAgent):
         Returns:
             str: The extracted service type or a generic wellness service.
         """
-        service_types = self._get_available_services()
-        for service in service_types:
-            if service in message.lower():
-                return service
-        return "general wellness service"
+        service_match = _SERVICE_RE.search(message)
+        return service_match.group(0).lower() if service_match else "general wellness service"
 
     def _extract_time(self, message: str) -> str:
         """
@@ -260,6 +356,6 @@ class WellnessAgent(BaseAgent):
         Returns:
             str: The extracted time or "next available".
         """
-        # Simple time extraction using regex
-        time_match = re.search(r'\b(\d{1,2}(?:am|pm))\b', message.lower())
-        return time_match.group(1) if time_match else "next available"
\ No newline at end of file
+        # Simple time extraction using a precompiled, case-insensitive regex
+        time_match = _TIME_RE.search(message)
+        return time_match.group(1).lower() if time_match else "next available"
\ No newline at end of file
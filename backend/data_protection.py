@@ -3,12 +3,12 @@ import json
 import logging
 import shutil
 from datetime import datetime, timezone, timedelta
-import schedule
-import time
 import threading
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+import orjson
+
+# Set up logging; HAI_LOG_LEVEL (e.g. WARNING) quiets the per-file cleanup messages
+logging.basicConfig(level=os.getenv("HAI_LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
 class DataProtectionManager:
@@ -24,6 +24,10 @@ class DataProtectionManager:
         self.logs_dir = os.path.join("logs")
         self.reports_dir = os.path.join("reports", "data_protection")
         
+        # Parsed conversation metadata keyed by path, reused while a file's
+        # modification time and size are unchanged
+        self._summary_cache = {}
+        
         # Create necessary directories
         os.makedirs(self.reports_dir, exist_ok=True)
     
@@ -34,48 +38,8 @@ class DataProtectionManager:
         """
         logger.info("Starting scheduled data cleanup")
         now = datetime.now(timezone.utc)
-        expired_count = 0
-        
-        # Clean up conversation files
-        if os.path.exists(self.conversations_dir):
-            for year_month_dir in os.listdir(self.conversations_dir):
-                year_month_path = os.path.join(self.conversations_dir, year_month_dir)
-                if os.path.isdir(year_month_path):
-                    for filename in os.listdir(year_month_path):
-                        if filename.endswith('.json'):
-                            file_path = os.path.join(year_month_path, filename)
-                            try:
-                                with open(file_path, "r") as f:
-                                    data = json.load(f)
-                                
-                                # Check if conversation has retention date
-                                if "gdpr_metadata" in data and "retention_date" in data["gdpr_metadata"]:
-                                    retention_date = datetime.fromisoformat(data["gdpr_metadata"]["retention_date"])
-                                    if now > retention_date:
-                                        logger.info(f"Deleting expired conversation: {filename}")
-                                        os.remove(file_path)
-                                        expired_count += 1
-                            except (json.JSONDecodeError, IOError) as e:
-                                logger.error(f"Error processing file {file_path}: {str(e)}")
-        
-        # Clean up log files
-        if os.path.exists(self.logs_dir):
-            for service_dir in os.listdir(self.logs_dir):
-                service_path = os.path.join(self.logs_dir, service_dir)
-                if os.path.isdir(service_path):
-                    for year_month_dir in os.listdir(service_path):
-                        year_month_path = os.path.join(service_path, year_month_dir)
-                        if os.path.isdir(year_month_path):
-                            for filename in os.listdir(year_month_path):
-                                if filename.endswith('.jsonl') or filename.endswith('.json'):
-                                    file_path = os.path.join(year_month_path, filename)
-                                    
-                                    # Check file age - logs older than 90 days are removed
-                                    file_time = datetime.fromtimestamp(os.path.getmtime(file_path), tz=timezone.utc)
-                                    if (now - file_time).days > 90:
-                                        logger.info(f"Deleting expired log file: {filename}")
-                                        os.remove(file_path)
-                                        expired_count += 1
+        
+        expired_count = self._scan(now, apply_cleanup=True)["removed_items"]
         
         # Clean up empty directories
         self._cleanup_empty_directories(self.conversations_dir)
@@ -91,13 +55,177 @@ class DataProtectionManager:
         
         return expired_count
         
+    def _scan(self, now, apply_cleanup=False):
+        """
+        Walk the conversation and log directories once, reading each
+        conversation file at most once (and not at all if it is unchanged
+        since the last scan), and collect the data inventory and retention
+        figures together.
+        
+        Args:
+            now: Reference time for retention checks
+            apply_cleanup: Delete expired conversations and logs older than 90 days while scanning
+            
+        Returns:
+            Dictionary with "data_inventory", "retention_compliance" and "removed_items".
+            Removed items are not counted in the inventory or compliance figures.
+        """
+        inventory = {
+            "total_conversations": 0,
+            "total_messages": 0,
+            "total_log_files": 0,
+            "oldest_data": None
+        }
+        compliance = {
+            "expired_files": 0,
+            "expiring_soon": 0,  # Files expiring in the next 7 days
+            "compliant_files": 0
+        }
+        removed_items = 0
+        oldest_timestamp = None
+        seen_paths = set()
+        
+        for entry in self._iter_files(self.conversations_dir, ('.json',)):
+            try:
+                summary = self._get_conversation_summary(entry)
+                error = "not a JSON object"
+            except (json.JSONDecodeError, IOError) as e:
+                summary, error = None, str(e)
+            
+            if summary is None:
+                if apply_cleanup:
+                    logger.error("Error processing file %s: %s", entry.path, error)
+                # Corrupted files should be considered expired
+                inventory["total_conversations"] += 1
+                compliance["expired_files"] += 1
+                continue
+            
+            retention_date = summary["retention_date"]
+            
+            if apply_cleanup and retention_date is not None and now > retention_date:
+                logger.info("Deleting expired conversation: %s", entry.name)
+                os.remove(entry.path)
+                removed_items += 1
+                continue
+            seen_paths.add(entry.path)
+            
+            # Count conversations and messages
+            inventory["total_conversations"] += 1
+            inventory["total_messages"] += summary["message_count"]
+            
+            creation_date = summary["creation_date"]
+            if creation_date is not None:
+                if oldest_timestamp is None or creation_date < oldest_timestamp:
+                    oldest_timestamp = creation_date
+            
+            # Check retention date
+            if retention_date is None:
+                # No retention date specified
+                compliance["expired_files"] += 1
+            elif now > retention_date:
+                compliance["expired_files"] += 1
+            elif (retention_date - now).days <= 7:
+                compliance["expiring_soon"] += 1
+            else:
+                compliance["compliant_files"] += 1
+        
+        for entry in self._iter_files(self.logs_dir, ('.jsonl', '.json')):
+            if apply_cleanup:
+                # DirEntry.stat() reuses the data fetched while scanning where the platform allows
+                file_time = datetime.fromtimestamp(entry.stat().st_mtime, tz=timezone.utc)
+                if (now - file_time).days > 90:
+                    logger.info("Deleting expired log file: %s", entry.name)
+                    os.remove(entry.path)
+                    removed_items += 1
+                    continue
+            inventory["total_log_files"] += 1
+        
+        # Forget files that were deleted since the last scan
+        for path in self._summary_cache.keys() - seen_paths:
+            del self._summary_cache[path]
+        
+        if oldest_timestamp:
+            inventory["oldest_data"] = oldest_timestamp.isoformat()
+        
+        return {
+            "data_inventory": inventory,
+            "retention_compliance": compliance,
+            "removed_items": removed_items
+        }
+    
+    def _get_conversation_summary(self, entry):
+        """
+        Get the metadata of a conversation file needed by the scan.
+        
+        The file is only read and parsed when its modification time or size
+        changed since it was last summarized.
+        
+        Args:
+            entry: os.DirEntry of the conversation file
+            
+        Returns:
+            Dictionary with "message_count", "creation_date" and "retention_date"
+            (the dates are None when not recorded), or None if the file does
+            not contain a JSON object
+        """
+        stat = entry.stat()
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._summary_cache.get(entry.path)
+        if cached is not None and cached[0] == stat_key:
+            return cached[1]
+        
+        with open(entry.path, "rb") as f:
+            raw = f.read().strip()
+        
+        # Truncated or empty files are rejected without raising a parser error
+        if not (raw.startswith(b"{") and raw.endswith(b"}")):
+            return None
+        data = orjson.loads(raw)
+        
+        gdpr_metadata = data.get("gdpr_metadata", {})
+        summary = {
+            "message_count": len(data["messages"]) if "messages" in data else 0,
+            "creation_date": None,
+            "retention_date": None
+        }
+        if "creation_date" in gdpr_metadata:
+            summary["creation_date"] = datetime.fromisoformat(gdpr_metadata["creation_date"])
+        if "retention_date" in gdpr_metadata:
+            summary["retention_date"] = datetime.fromisoformat(gdpr_metadata["retention_date"])
+        
+        self._summary_cache[entry.path] = (stat_key, summary)
+        return summary
+    
+    def _iter_files(self, root_dir, extensions):
+        """
+        Recursively yield os.DirEntry objects for files under root_dir.
+        
+        Uses os.scandir so file type checks come from the directory listing
+        instead of a separate stat call per entry.
+        
+        Args:
+            root_dir: Directory to walk
+            extensions: Tuple of file name suffixes to include
+        """
+        try:
+            with os.scandir(root_dir) as it:
+                entries = list(it)
+        except (FileNotFoundError, NotADirectoryError):
+            return
+        
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from self._iter_files(entry.path, extensions)
+            elif entry.name.endswith(extensions) and entry.is_file():
+                yield entry
+
     def _cleanup_empty_directories(self, root_dir):
         """Remove empty directories recursively"""
         for dirpath, dirnames, filenames in os.walk(root_dir, topdown=False):
             if not dirnames and not filenames and dirpath != root_dir:
                 try:
                     os.rmdir(dirpath)
-                    logger.info(f"Removed empty directory: {dirpath}")
+                    logger.info("Removed empty directory: %s", dirpath)
                 except OSError:
                     pass
     
@@ -108,11 +236,12 @@ class DataProtectionManager:
         """
         logger.info("Starting data protection assessment")
         now = datetime.now(timezone.utc)
+        scan = self._scan(now)
         
         assessment = {
             "timestamp": now.isoformat(),
-            "data_inventory": self._count_stored_data(),
-            "retention_compliance": self._check_retention_compliance(),
+            "data_inventory": scan["data_inventory"],
+            "retention_compliance": scan["retention_compliance"],
             "anonymization_effectiveness": self._test_anonymization_effectiveness(),
             "risk_score": 0,
             "recommendations": []
@@ -135,95 +264,6 @@ class DataProtectionManager:
         logger.info(f"Data protection assessment completed. Risk score: {assessment['risk_score']}")
         return assessment
     
-    def _count_stored_data(self):
-        """Count the amount of stored data"""
-        result = {
-            "total_conversations": 0,
-            "total_messages": 0,
-            "total_log_files": 0,
-            "oldest_data": None
-        }
-        
-        oldest_timestamp = None
-        
-        # Count conversations and messages
-        if os.path.exists(self.conversations_dir):
-            for year_month_dir in os.listdir(self.conversations_dir):
-                year_month_path = os.path.join(self.conversations_dir, year_month_dir)
-                if os.path.isdir(year_month_path):
-                    for filename in os.listdir(year_month_path):
-                        if filename.endswith('.json'):
-                            result["total_conversations"] += 1
-                            file_path = os.path.join(year_month_path, filename)
-                            
-                            try:
-                                with open(file_path, "r") as f:
-                                    data = json.load(f)
-                                
-                                # Count messages
-                                if "messages" in data:
-                                    result["total_messages"] += len(data["messages"])
-                                
-                                # Check timestamp
-                                if "gdpr_metadata" in data and "creation_date" in data["gdpr_metadata"]:
-                                    timestamp = datetime.fromisoformat(data["gdpr_metadata"]["creation_date"])
-                                    if oldest_timestamp is None or timestamp < oldest_timestamp:
-                                        oldest_timestamp = timestamp
-                            except (json.JSONDecodeError, IOError):
-                                pass
-        
-        # Count log files
-        if os.path.exists(self.logs_dir):
-            for root, _, files in os.walk(self.logs_dir):
-                for filename in files:
-                    if filename.endswith('.jsonl') or filename.endswith('.json'):
-                        result["total_log_files"] += 1
-        
-        if oldest_timestamp:
-            result["oldest_data"] = oldest_timestamp.isoformat()
-        
-        return result
-    
-    def _check_retention_compliance(self):
-        """Check if any data has exceeded its retention period"""
-        now = datetime.now(timezone.utc)
-        result = {
-            "expired_files": 0,
-            "expiring_soon": 0,  # Files expiring in the next 7 days
-            "compliant_files": 0
-        }
-        
-        # Check conversations
-        if os.path.exists(self.conversations_dir):
-            for year_month_dir in os.listdir(self.conversations_dir):
-                year_month_path = os.path.join(self.conversations_dir, year_month_dir)
-                if os.path.isdir(year_month_path):
-                    for filename in os.listdir(year_month_path):
-                        if filename.endswith('.json'):
-                            file_path = os.path.join(year_month_path, filename)
-                            
-                            try:
-                                with open(file_path, "r") as f:
-                                    data = json.load(f)
-                                
-                                # Check retention date
-                                if "gdpr_metadata" in data and "retention_date" in data["gdpr_metadata"]:
-                                    retention_date = datetime.fromisoformat(data["gdpr_metadata"]["retention_date"])
-                                    if now > retention_date:
-                                        result["expired_files"] += 1
-                                    elif (retention_date - now).days <= 7:
-                                        result["expiring_soon"] += 1
-                                    else:
-                                        result["compliant_files"] += 1
-                                else:
-                                    # No retention date specified
-                                    result["expired_files"] += 1
-                            except (json.JSONDecodeError, IOError):
-                                # Corrupted files should be considered expired
-                                result["expired_files"] += 1
-        
-        return result
-    
     def _test_anonymization_effectiveness(self):
         """Test the effectiveness of the anonymization process"""
         # This is a simplified test - in a real system, you would use more sophisticated methods
@@ -235,8 +275,7 @@ class DataProtectionManager:
             "My name is Mr. Smith"
         ]
         
-        from backend.ai_agents.conversation_memory import ConversationMemory
-        memory = ConversationMemory()
+        from backend.ai_agents.conversation_memory import anonymize_personal_data
         
         results = {
             "total_tests": len(test_cases),
@@ -245,8 +284,11 @@ class DataProtectionManager:
             "examples": []
         }
         
-        for test in test_cases:
-            anonymized = memory._anonymize_personal_data(test)
+        # The anonymizer is a module-level compiled pattern, so no
+        # ConversationMemory (and its conversation ids) needs to be created
+        anonymized_texts = [anonymize_personal_data(test) for test in test_cases]
+        
+        for test, anonymized in zip(test_cases, anonymized_texts):
             success = test != anonymized
             
             results["examples"].append({
@@ -281,29 +323,74 @@ class DataProtectionManager:
         
         record_file = os.path.join(record_dir, f"activity_log_{now.strftime('%Y%m')}.jsonl")
         
-        with open(record_file, "a") as f:
-            json.dump(record, f)
-            f.write("\n")
+        with open(record_file, "ab") as f:
+            f.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
 
 # Singleton instance
 data_protection_manager = DataProtectionManager()
 
+def _first_run(hour, minute=0, weekday=None):
+    """
+    Next local time hour:minute from now.
+    
+    Args:
+        hour: Hour of the day (0-23)
+        minute: Minute of the hour
+        weekday: Optional day of the week (Monday=0 ... Sunday=6)
+    """
+    now = datetime.now()
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if weekday is not None:
+        target += timedelta(days=(weekday - now.weekday()) % 7)
+    if target <= now:
+        target += timedelta(days=1 if weekday is None else 7)
+    return target
+
+def _schedule_recurring(job, hour, minute=0, weekday=None, target=None):
+    """
+    Run a job at the next matching local time and re-arm after each run.
+    
+    The timer sleeps until the exact fire time instead of polling. Each run
+    schedules the next one from its own target time rather than from the
+    clock, so a timer that wakes slightly early cannot run the job twice
+    for the same day.
+    
+    Args:
+        job: Callable to run
+        hour: Hour of the day (0-23)
+        minute: Minute of the hour
+        weekday: Optional day of the week (Monday=0 ... Sunday=6); daily if None
+        target: Local time of this run; the next matching time if None
+    """
+    if target is None:
+        target = _first_run(hour, minute, weekday)
+    period = timedelta(days=1 if weekday is None else 7)
+    
+    def run():
+        try:
+            job()
+        except Exception as e:
+            logger.error("Error running scheduled task %s: %s", job.__name__, e)
+        next_target = target + period
+        # Skip runs missed while the process was suspended instead of replaying them
+        now = datetime.now()
+        while next_target <= now:
+            next_target += period
+        _schedule_recurring(job, hour, minute, weekday, next_target)
+    
+    delay = max((target - datetime.now()).total_seconds(), 0)
+    timer = threading.Timer(delay, run)
+    timer.daemon = True
+    timer.start()
+    return timer
+
 def start_scheduled_tasks():
     """Start scheduled data protection tasks"""
     # Schedule daily data cleanup at 3 AM
-    schedule.every().day.at("03:00").do(data_protection_manager.cleanup_expired_data)
+    _schedule_recurring(data_protection_manager.cleanup_expired_data, 3)
     
     # Schedule weekly data protection assessment on Sundays at 4 AM
-    schedule.every().sunday.at("04:00").do(data_protection_manager.perform_data_protection_assessment)
-    
-    # Run the scheduler in a separate thread
-    def run_scheduler():
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
-    
-    scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-    scheduler_thread.start()
+    _schedule_recurring(data_protection_manager.perform_data_protection_assessment, 4, weekday=6)
     
     logger.info("Data protection scheduled tasks started")
 
@@ -1,14 +1,281 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import os
+import threading
+import importlib.metadata
+import importlib.util
+from functools import lru_cache
+
+# Expandable segments (PyTorch 2.1+) let the CUDA caching allocator grow blocks in place rather
+# than fragmenting as prompt and KV-cache sizes vary. Must be set before CUDA is initialized.
+try:
+    _torch_version = tuple(int(part) for part in importlib.metadata.version("torch").split(".")[:2])
+except (importlib.metadata.PackageNotFoundError, ValueError):
+    _torch_version = (0, 0)
+if _torch_version >= (2, 1):
+    os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True")
+
 import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import (
+    AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig,
+    StoppingCriteria, StoppingCriteriaList
+)
 import json
 import logging
 
 # Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logging.basicConfig(level=os.getenv("HAI_LOG_LEVEL", "INFO").upper(), format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Fine-tuned model used by the chatbot and the agents; HAI_MODEL_PATH points elsewhere
+DEFAULT_MODEL_PATH = os.getenv("HAI_MODEL_PATH") or os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', 'finetunedmodel-merged')
+)
+
+# Models already loaded in this process, keyed by their load settings
+_loaded_models: Dict[Tuple[str, str, str], Tuple[Any, Any]] = {}
+_model_lock = threading.Lock()
+
+# Weight formats accepted by load_model_and_tokenizer
+PRECISIONS = ("fp16", "nf4", "int8", "fp32")
+
+def _bitsandbytes_version() -> Tuple[int, ...]:
+    """
+    Return the installed bitsandbytes version.
+    
+    Returns:
+        Tuple[int, ...]: Major and minor version, or (0, 0) when bitsandbytes is not installed.
+    """
+    try:
+        return tuple(int(part) for part in importlib.metadata.version("bitsandbytes").split(".")[:2])
+    except (importlib.metadata.PackageNotFoundError, ValueError):
+        return (0, 0)
+
+@lru_cache(maxsize=None)
+def _default_precision(device: str = "auto") -> str:
+    """
+    Pick the weight format for this machine.
+    
+    Args:
+        device (str): Device map the model will be loaded on ('cpu', 'cuda', or 'auto').
+    
+    Returns:
+        str: 'fp32' on CPU, 'fp16' on GPUs with at least 16 GB, otherwise 'nf4' when
+             bitsandbytes supports it (0.39+), then 'int8', then 'fp16'.
+    """
+    if device == "cpu" or not torch.cuda.is_available():
+        return "fp32"
+    total_memory = torch.cuda.get_device_properties(0).total_memory
+    if total_memory >= 16 * 1024 ** 3:
+        return "fp16"
+    bnb_version = _bitsandbytes_version()
+    if bnb_version >= (0, 39):
+        return "nf4"
+    return "int8" if bnb_version > (0, 0) else "fp16"
+
+def _precision_kwargs(precision: str) -> Dict[str, Any]:
+    """
+    Translate a precision name into from_pretrained keyword arguments.
+    
+    Args:
+        precision (str): One of PRECISIONS.
+    
+    Returns:
+        Dict[str, Any]: Keyword arguments selecting the weight format.
+    """
+    if precision == "fp16":
+        return {"torch_dtype": torch.float16}
+    if precision == "nf4":
+        return {
+            "quantization_config": BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_quant_type="nf4",
+                bnb_4bit_use_double_quant=True,
+                bnb_4bit_compute_dtype=torch.float16
+            )
+        }
+    if precision == "int8":
+        return {"quantization_config": BitsAndBytesConfig(load_in_8bit=True)}
+    if precision == "fp32":
+        return {}
+    raise ValueError(f"Unknown precision '{precision}', expected one of {', '.join(PRECISIONS)}")
+
+@lru_cache(maxsize=1)
+def _attention_implementations() -> Tuple[str, ...]:
+    """
+    List the attention kernels to try, fastest first.
+    
+    Returns:
+        Tuple[str, ...]: FlashAttention-2 when flash-attn is installed on an SM80+ GPU,
+                         then PyTorch SDPA, then the eager implementation.
+    """
+    candidates = ("sdpa", "eager")
+    if (
+        torch.cuda.is_available()
+        and torch.cuda.get_device_capability(0)[0] >= 8
+        and importlib.util.find_spec("flash_attn") is not None
+    ):
+        candidates = ("flash_attention_2",) + candidates
+    return candidates
+
+def load_model_and_tokenizer(model_path: str, device: str = "auto", precision: Optional[str] = None) -> Tuple[Any, Any]:
+    """
+    Load a model and its tokenizer, reusing the copy already in memory if there is one.
+    
+    The first call for a given set of settings loads the weights; concurrent callers
+    wait for that load instead of starting their own.
+    
+    Args:
+        model_path (str): Path to the local model directory.
+        device (str): Device map to load the model on ('cpu', 'cuda', or 'auto').
+        precision (Optional[str]): Weight format, one of PRECISIONS. If None, HAI_MODEL_PRECISION
+                                   is used, falling back to a format chosen for the device and GPU memory.
+    
+    Returns:
+        Tuple[Any, Any]: The loaded model and tokenizer.
+    """
+    precision = precision or os.getenv("HAI_MODEL_PRECISION") or _default_precision(device)
+    model_kwargs = _precision_kwargs(precision)
+    
+    key = (model_path, device, precision)
+    with _model_lock:
+        if key not in _loaded_models:
+            logger.info(f"Loading model from: {model_path} ({precision})")
+            
+            tokenizer = AutoTokenizer.from_pretrained(
+                model_path,
+                trust_remote_code=True
+            )
+            
+            # Models that don't support a kernel reject it at load time, so fall through to the next one.
+            # Eager is the default kernel, so it is requested by omitting the argument; that keeps the
+            # last attempt working on transformers releases that predate attn_implementation.
+            for attn_implementation in _attention_implementations():
+                attn_kwargs = {} if attn_implementation == "eager" else {"attn_implementation": attn_implementation}
+                try:
+                    model = AutoModelForCausalLM.from_pretrained(
+                        model_path,
+                        trust_remote_code=True,
+                        device_map=device,
+                        **attn_kwargs,
+                        **model_kwargs
+                    )
+                    break
+                except (ImportError, ValueError, TypeError) as e:
+                    if attn_implementation == "eager":
+                        raise
+                    logger.warning(f"Attention implementation '{attn_implementation}' unavailable: {str(e)}")
+            
+            # Inference only: disable dropout and gradient tracking once, up front
+            model.eval()
+            model.requires_grad_(False)
+            
+            _loaded_models[key] = (model, tokenizer)
+            logger.info(f"Model loaded successfully (attention: {attn_implementation})")
+        
+        return _loaded_models[key]
+
+# Markers that open a new turn in the model's chat format
+TURN_MARKERS = ("<|user|>", "<|system|>")
+# Speaker labels used by ConversationMemory's history; prompts that embed it can get them echoed back
+HISTORY_MARKERS = ("\nUser:", "\nAssistant:")
+
+class StopOnStrings(StoppingCriteria):
+    """
+    Stop generation once the reply starts a new chat turn.
+    
+    Without this the model keeps writing an imagined next exchange until
+    max_new_tokens, and those tokens are thrown away afterwards.
+    """
+    
+    def __init__(self, tokenizer, prompt_length: int, stop_strings: Tuple[str, ...] = TURN_MARKERS, lookback: int = 8):
+        """
+        Initialize the stopping criterion for one generate call.
+        
+        Args:
+            tokenizer: Tokenizer used to decode the most recent tokens.
+            prompt_length (int): Number of prompt tokens, which are never checked.
+            stop_strings (Tuple[str, ...]): Turn markers that end the reply.
+            lookback (int): Number of already checked tokens decoded again at each step, so a
+                            marker split across steps is still found.
+        """
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self.stop_strings = stop_strings
+        self.lookback = lookback
+        self._checked = 0
+    
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> bool:
+        generated = input_ids[0, self.prompt_length:]
+        # A step can append several tokens when prompt lookup accepts a draft
+        start = max(self._checked - self.lookback, 0)
+        self._checked = generated.shape[0]
+        tail = self.tokenizer.decode(generated[start:])
+        return any(stop in tail for stop in self.stop_strings)
+    
+    def truncate(self, text: str) -> str:
+        """
+        Cut a decoded reply at the first turn marker.
+        
+        Args:
+            text (str): Decoded reply text.
+        
+        Returns:
+            str: The text before any turn marker.
+        """
+        for stop in self.stop_strings:
+            text = text.split(stop, 1)[0]
+        return text
+
+# Greedy generate() settings shared by the agents; replies reuse facts from the prompt,
+# so prompt lookup drafts tokens from it
+GREEDY_GENERATION_KWARGS: Dict[str, Any] = {
+    "max_new_tokens": 150,
+    "do_sample": False,
+    "prompt_lookup_num_tokens": 10,
+    "repetition_penalty": 1.2
+}
+
+def generate_reply(
+    model,
+    tokenizer,
+    prompt: str,
+    device=None,
+    stop_strings: Tuple[str, ...] = TURN_MARKERS,
+    **generation_kwargs
+) -> str:
+    """
+    Generate the model's reply to a fully formatted prompt.
+    
+    Args:
+        model: Loaded causal language model.
+        tokenizer: Tokenizer matching the model.
+        prompt (str): Prompt in the model's chat format, ending with the assistant marker.
+        device: Device to place the inputs on. If None, the model's device is used.
+        stop_strings (Tuple[str, ...]): Strings that end the reply.
+        **generation_kwargs: Keyword arguments passed on to model.generate.
+    
+    Returns:
+        str: The reply text, cut at the first stop string.
+    """
+    inputs = tokenizer(prompt, return_tensors="pt", truncation=True, max_length=1024).to(device or model.device)
+    prompt_length = inputs["input_ids"].shape[1]
+    stop = StopOnStrings(tokenizer, prompt_length, stop_strings=stop_strings)
+    generation_kwargs.setdefault("pad_token_id", tokenizer.eos_token_id)
+    
+    with torch.inference_mode():
+        outputs = model.generate(
+            **inputs,
+            **generation_kwargs,
+            stopping_criteria=StoppingCriteriaList([stop])
+        )
+    
+    # Decode only the generated tokens; the prompt is already known. Special tokens are kept
+    # until after truncation, since turn markers may be special tokens themselves.
+    response = stop.truncate(tokenizer.decode(outputs[0, prompt_length:]))
+    for special_token in tokenizer.all_special_tokens:
+        response = response.replace(special_token, "")
+    return response.strip()
+
 class LocalModelChatbot:
     """
     A chatbot implementation that uses a local language model for generating responses.
@@ -21,36 +288,41 @@ class LocalModelChatbot:
         self, 
         model_path: Optional[str] = None,
         device: str = "auto",
-        load_in_8bit: bool = True,
+        *,
+        precision: Optional[str] = None,
         max_new_tokens: int = 150,
         temperature: float = 0.7,
         top_k: int = 50,
         top_p: float = 0.9,
-        repetition_penalty: float = 1.2
+        repetition_penalty: float = 1.2,
+        do_sample: bool = False
     ):
         """
         Initialize the LocalModelChatbot with a specified model.
         
         Args:
-            model_path (Optional[str]): Path to the local model directory. If None, uses default path.
+            model_path (Optional[str]): Path to the local model directory. If None, uses DEFAULT_MODEL_PATH.
             device (str): Device to load the model on ('cpu', 'cuda', or 'auto').
-            load_in_8bit (bool): Whether to load the model in 8-bit precision to save memory.
+            precision (Optional[str]): Weight format: 'fp16', 'nf4', 'int8' or 'fp32'.
+                                       If None, one is chosen from the available GPU memory.
             max_new_tokens (int): Maximum number of tokens to generate in responses.
             temperature (float): Sampling temperature for generation.
             top_k (int): Number of highest probability tokens to keep for top-k sampling.
             top_p (float): Cumulative probability threshold for top-p sampling.
             repetition_penalty (float): Penalty for repeating tokens.
-        """
-        # Set default model path if not provided
-        if model_path is None:
-            model_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'finetunedmodel-merged'))
+            do_sample (bool): Sample the response instead of decoding greedily. The temperature,
+                              top_k and top_p settings only apply when this is True.
         
-        self.model_path = model_path
+        Arguments after device are keyword-only, so callers written for the old
+        load_in_8bit signature fail loudly instead of binding the wrong values.
+        """
+        self.model_path = model_path or DEFAULT_MODEL_PATH
         self.device = device
-        self.load_in_8bit = load_in_8bit
+        self.precision = precision
         
         # Generation parameters
         self.max_new_tokens = max_new_tokens
+        self.do_sample = do_sample
         self.temperature = temperature
         self.top_k = top_k
         self.top_p = top_p
@@ -62,21 +334,11 @@ class LocalModelChatbot:
     def _load_model(self):
         """Load the model and tokenizer from the specified path."""
         try:
-            logger.info(f"Loading model from: {self.model_path}")
-            
-            self.tokenizer = AutoTokenizer.from_pretrained(
+            self.model, self.tokenizer = load_model_and_tokenizer(
                 self.model_path,
-                trust_remote_code=True
+                device=self.device,
+                precision=self.precision
             )
-            
-            self.model = AutoModelForCausalLM.from_pretrained(
-                self.model_path,
-                trust_remote_code=True,
-                load_in_8bit=self.load_in_8bit,
-                device_map=self.device
-            )
-            
-            logger.info("Model loaded successfully")
         except Exception as e:
             logger.error(f"Error loading model: {str(e)}")
             raise
@@ -93,6 +355,49 @@ class LocalModelChatbot:
         Returns:
             str: The generated response.
         """
+        full_prompt = self._build_prompt(user_message, system_prompt)
+        
+        try:
+            generation_kwargs = self._generation_kwargs()
+            if not self.do_sample:
+                # Greedy replies reuse hotel facts from the prompt, so drafting from it pays off
+                generation_kwargs["prompt_lookup_num_tokens"] = GREEDY_GENERATION_KWARGS["prompt_lookup_num_tokens"]
+            
+            return generate_reply(self.model, self.tokenizer, full_prompt, **generation_kwargs)
+        
+        except Exception as e:
+            logger.error(f"Error generating response: {str(e)}")
+            return f"I'm sorry, I encountered an error: {str(e)}"
+    
+    def _generation_kwargs(self) -> Dict[str, Any]:
+        """
+        Collect the generate() settings for this chatbot.
+        
+        Returns:
+            Dict[str, Any]: Keyword arguments for model.generate, with the sampling settings
+                            included only when sampling is enabled.
+        """
+        generation_kwargs = {
+            "max_new_tokens": self.max_new_tokens,
+            "do_sample": self.do_sample,
+            "repetition_penalty": self.repetition_penalty,
+            "pad_token_id": self.tokenizer.eos_token_id
+        }
+        if self.do_sample:
+            generation_kwargs.update(temperature=self.temperature, top_k=self.top_k, top_p=self.top_p)
+        return generation_kwargs
+    
+    def _build_prompt(self, user_message: str, system_prompt: Optional[str] = None) -> str:
+        """
+        Format the user's message and system prompt for the model.
+        
+        Args:
+            user_message (str): The user's input message.
+            system_prompt (Optional[str]): Optional system prompt. If None, a default prompt is used.
+        
+        Returns:
+            str: The full prompt in the model's chat format.
+        """
         # Use default system prompt if none provided
         if system_prompt is None:
             system_prompt = (
@@ -101,39 +406,7 @@ class LocalModelChatbot:
                 "If you don't know something, say so rather than making up information."
             )
         
-        # Format the prompt for the model
-        full_prompt = f"<|system|>\n{system_prompt}\n<|user|>\n{user_message}\n<|assistant|>\n"
-        
-        try:
-            # Tokenize the prompt
-            inputs = self.tokenizer(full_prompt, return_tensors="pt", truncation=True, max_length=1024)
-            inputs = {key: value.to(self.model.device) for key, value in inputs.items()}
-            
-            # Generate response
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    **inputs,
-                    max_new_tokens=self.max_new_tokens,
-                    temperature=self.temperature,
-                    top_k=self.top_k,
-                    top_p=self.top_p,
-                    repetition_penalty=self.repetition_penalty,
-                    pad_token_id=self.tokenizer.eos_token_id
-                )
-            
-            # Decode the response
-            full_response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            
-            # Extract just the assistant's part of the response
-            if "<|assistant|>" in full_response:
-                assistant_response = full_response.split("<|assistant|>")[-1].strip()
-                return assistant_response
-            else:
-                return full_response
-        
-        except Exception as e:
-            logger.error(f"Error generating response: {str(e)}")
-            return f"I'm sorry, I encountered an error: {str(e)}"
+        return f"<|system|>\n{system_prompt}\n<|user|>\n{user_message}\n<|assistant|>\n"
     
     def chat(self, message: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
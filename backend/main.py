@@ -1,6 +1,9 @@
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import uvicorn
 import sys
 import os
@@ -15,7 +18,11 @@ from backend.ai_agents.agent_manager import AgentManager
 # Initialize the agent manager
 agent_manager = AgentManager()
 
-app = FastAPI()
+# The agents share one model and one conversation memory, so messages are
+# processed one at a time on a dedicated thread instead of the event loop
+agent_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="agent-worker")
+
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -32,14 +39,32 @@ class ChatRequest(BaseModel):
 @app.post("/chat")
 async def chat_endpoint(request: ChatRequest):
     try:
-        # Process the message through the agent manager
-        response = agent_manager.process(request.content)
+        # Process the message through the agent manager on the agent worker
+        # so model inference does not block the event loop
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(agent_executor, agent_manager.process, request.content)
         return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 def main():
-    uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=True)
+    # Auto-reload is for development; set HAI_RELOAD=0 in production. Each
+    # extra worker (HAI_WORKERS) loads its own copy of the model, and uvicorn
+    # ignores workers while reload is on.
+    reload = os.getenv("HAI_RELOAD", "1") == "1"
+    workers = int(os.getenv("HAI_WORKERS", "1"))
+    
+    # "auto" picks uvloop and the httptools parser when they are installed
+    # and falls back to asyncio and h11 otherwise (uvloop is not available on Windows)
+    uvicorn.run(
+        "backend.main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=reload,
+        workers=workers,
+        loop="auto",
+        http="auto"
+    )
 
 if __name__ == "__main__":
     main()